@@ -0,0 +1,23 @@
+"""Pytest configuration.
+
+Installs a minimal stand-in for the serial module when pyserial is not
+available, e.g. under interpreters like PyPy where it may not be installed.
+The tests only need its exception types since they use a fake serial device.
+"""
+
+import sys
+import types
+
+try:
+    import serial  # noqa
+except ImportError:
+    class SerialException(IOError):
+        """Stand-in for serial.SerialException."""
+
+    class SerialTimeoutException(SerialException):
+        """Stand-in for serial.SerialTimeoutException."""
+
+    _serial = types.ModuleType('serial')
+    _serial.SerialException = SerialException
+    _serial.SerialTimeoutException = SerialTimeoutException
+    sys.modules['serial'] = _serial
@@ -1,11 +1,23 @@
 """Library for controlling an HMDI matrix device over RS232"""
 
+import asyncio
+import contextlib
+import functools
 import logging
+import operator
+import struct
 
 import serial
 
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+_log = logging.getLogger(__name__)
+
 # Command constants.
-_CMD_HEADER = [0xa5, 0x5b]
+_CMD_HEADER = b'\xa5\x5b'
 _CMD_CODE_LENGTH = 2
 _CMD_DATA_LENGTH = 8
 _CMD_LENGTH = len(_CMD_HEADER) + _CMD_CODE_LENGTH + _CMD_DATA_LENGTH + 1
@@ -13,23 +25,33 @@ _MIN_PORT_NUMBER = 1
 _MAX_PORT_NUMBER = 4
 
 # Command codes.
-_CMD_CHANGE_PORT = [0x02, 0x03]
-_CMD_QUERY_PORT = [0x02, 0x01]
-_CMD_SET_EDID = [0x03, 0x02]
-_CMD_SET_EDID_TO_ALL = [0x03, 0x01]
-_CMD_COPY_EDID = [0x03, 0x04]
-_CMD_COPY_EDID_TO_ALL = [0x03, 0x03]
-_CMD_QUERY_HDP = [0x01, 0x05]
-_CMD_QUERY_STATUS = [0x01, 0x04]
-_CMD_SET_BEEP = [0x06, 0x01]
-_CMD_QUERY_BEEP = [0x01, 0x0b]
+_CMD_CHANGE_PORT = b'\x02\x03'
+_CMD_QUERY_PORT = b'\x02\x01'
+_CMD_SET_EDID = b'\x03\x02'
+_CMD_SET_EDID_TO_ALL = b'\x03\x01'
+_CMD_COPY_EDID = b'\x03\x04'
+_CMD_COPY_EDID_TO_ALL = b'\x03\x03'
+_CMD_QUERY_HDP = b'\x01\x05'
+_CMD_QUERY_STATUS = b'\x01\x04'
+_CMD_SET_BEEP = b'\x06\x01'
+_CMD_QUERY_BEEP = b'\x01\x0b'
 
 # Values used for representing beep state.
 _BEEP_ON = 0x0f
 _BEEP_OFF = 0xf0
 
-# Used in calculating checksums.
-_CHECKSUM_BASE = 0x100
+# Header and command code prefix of each command, with the prefix's
+# contribution to the checksum, so neither is rebuilt per command.
+_CMD_PREFIXES = {
+    cmd_code: (_CMD_HEADER + cmd_code, sum(_CMD_HEADER + cmd_code))
+    for cmd_code in (_CMD_CHANGE_PORT, _CMD_QUERY_PORT, _CMD_SET_EDID, _CMD_SET_EDID_TO_ALL,
+                     _CMD_COPY_EDID, _CMD_COPY_EDID_TO_ALL, _CMD_QUERY_HDP, _CMD_QUERY_STATUS,
+                     _CMD_SET_BEEP, _CMD_QUERY_BEEP)
+}
+
+# Command layout: prefix, arg1, pad, arg2, remaining data padding, checksum.
+_CMD_STRUCT = struct.Struct(
+    '%dsBxB%dxB' % (len(_CMD_HEADER) + _CMD_CODE_LENGTH, _CMD_DATA_LENGTH - 3))
 
 # EDID values.
 EDID_1080I_20 = 1
@@ -51,72 +73,173 @@ EDID_DVI_1920_1200 = 15
 _MIN_EDID = EDID_1080I_20
 _MAX_EDID = EDID_DVI_1920_1200
 
+# Below this many responses the scalar checksum check is faster than NumPy.
+_BULK_CHECKSUM_MIN_COUNT = 16
+
+# Seconds of silence after a timed out async read before input is considered
+# drained of any partial or late response.
+_DISCARD_QUIET_TIME = 0.05
+
+# Valid argument values.
+_VALID_PORTS = frozenset(range(_MIN_PORT_NUMBER, _MAX_PORT_NUMBER + 1))
+_VALID_EDIDS = frozenset(range(_MIN_EDID, _MAX_EDID + 1))
+
 
 class HdmiMatrixControllerException(Exception):
     """Exception type thrown for errors receiving data."""
     pass
 
 
+@functools.lru_cache(maxsize=512)
+def _generate_cmd(cmd_code, arg1=0, arg2=0):
+    """Builds a command out of all the pieces of a command.
+
+    The set of legal commands is small, so finished commands are cached and
+    repeated commands are returned without being rebuilt.
+
+    Args:
+        cmd_code (bytes): One of the 2 byte _CMD_* command codes.
+        arg1 (int): First argument to the command if used.
+        arg2 (int): Second argument to the command if used.
+
+    Returns:
+        bytes: A complete command ready to be sent over serial.
+    """
+    prefix, prefix_sum = _CMD_PREFIXES[cmd_code]
+    return _CMD_STRUCT.pack(prefix, arg1, arg2, (-(prefix_sum + arg1 + arg2)) & 0xff)
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """Imports NumPy on first use, so importing this module stays cheap.
+
+    Returns:
+        module: The numpy module, or None if it is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _hex(data):
+    """Formats binary data as space separated hex for logging.
+
+    Single frames are cached since the same commands and responses are logged
+    repeatedly. Larger buffers, such as batches, are formatted directly so the
+    cache does not keep them alive.
+
+    Args:
+        data (bytes): The data to format.
+
+    Returns:
+        str: The data as hex, e.g. 'a5 5b 02 03'.
+    """
+    if len(data) == _CMD_LENGTH:
+        return _hex_frame(data)
+    return data.hex(' ')
+
+
+@functools.lru_cache(maxsize=256)
+def _hex_frame(frame):
+    """Formats a single frame as space separated hex, caching the result.
+
+    Args:
+        frame (bytes): The frame to format.
+
+    Returns:
+        str: The frame as hex.
+    """
+    return frame.hex(' ')
+
+
 class HdmiMatrixController(object):
     """Controls an HDMI matrix device over RS232."""
 
+    __slots__ = ('_ser_write', '_ser_readinto', '_buffer')
+
     def __init__(self, serial_device):
         """Initializer.
 
         Args:
             serial_device (obj: serial.Serial): An open serial device.
         """
-        self._ser = serial_device
+        # Only the bound methods are kept, to skip attribute lookups on every command.
+        self._ser_write = serial_device.write
+        self._ser_readinto = serial_device.readinto
+        self._buffer = None
 
     @staticmethod
-    def _generate_cmd(cmd_code, arg1=0, arg2=0):
-        """Builds a command out of all the pieces of a command.
+    def build_frames(cmd_codes, args):
+        """Builds many complete commands into a single buffer.
 
         Args:
-            cmd_code (array): The 2 byte command code.
-            arg1 (int): First argument to the command if used.
-            arg2 (int): Second argument to the command if used.
+            cmd_codes (sequence): The 2 byte _CMD_* command code of each command, as
+                bytes or as a pair of integers, e.g. a row of an (N, 2) ndarray.
+            args (sequence): The (arg1, arg2) integer pair of each command, each 0-255.
 
         Returns:
-            str: A complete command ready to be sent over serial.
+            bytes: The commands concatenated, ready to be passed to send_batch.
+
+        Raises:
+            ValueError: cmd_codes and args differ in length, a command code is
+                unknown or an argument is not an integer in range.
         """
-        data = [0] * _CMD_DATA_LENGTH
-        data[0] = arg1
-        data[2] = arg2
-        cmd = _CMD_HEADER + cmd_code + data
-        HdmiMatrixController._append_checksum(cmd)
-        return ''.join(chr(c) for c in cmd)
+        if len(cmd_codes) != len(args):
+            raise ValueError('Got %d command codes but %d argument pairs.'
+                             % (len(cmd_codes), len(args)))
+        cmds = []
+        for cmd_code, (arg1, arg2) in zip(cmd_codes, args):
+            try:
+                cmd_code = bytes(operator.index(c) for c in cmd_code)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid command code: %r.' % (cmd_code,))
+            if cmd_code not in _CMD_PREFIXES:
+                raise ValueError('Unknown command code: %r.' % (cmd_code,))
+            try:
+                arg1, arg2 = operator.index(arg1), operator.index(arg2)
+            except TypeError:
+                raise ValueError('Invalid command arguments: %r.' % ((arg1, arg2),))
+            if not (0 <= arg1 <= 0xff and 0 <= arg2 <= 0xff):
+                raise ValueError('Invalid command arguments: %r.' % ((arg1, arg2),))
+            cmds.append(_generate_cmd(cmd_code, arg1, arg2))
+        return b''.join(cmds)
 
     @staticmethod
-    def _append_checksum(cmd):
-        """Calculates the checksum and appends it to the command.
+    def _checksum_valid(response_data):
+        """Checks whether the checksum is valid on a response buffer.
 
         Args:
-            cmd (array): A command buffer without a checksum.
+            response_data (bytes): A complete response received from the device.
+
+        Returns:
+            bool: True if the checksum is valid, False otherwise.
         """
-        checksum = _CHECKSUM_BASE - sum(cmd)
-        if checksum < 0:
-            while checksum < 0:
-                checksum += 0xff
-            checksum += 1
-        cmd.append(checksum)
+        return response_data[-1] == (-sum(response_data[:-1])) & 0xff
 
     @staticmethod
-    def _checksum_valid(response_data):
-        """Checks whether the checksum is valid on a response buffer.
+    def _checksums_valid_bulk(response_data, count):
+        """Checks the checksums of several back to back responses at once.
+
+        Uses NumPy when it is installed and there are at least
+        _BULK_CHECKSUM_MIN_COUNT responses. Fewer responses are checked one at
+        a time with _checksum_valid, which is faster for short inputs.
 
         Args:
-            response_buffer (str): A complete response received from the device.
+            response_data (bytes): count complete responses, concatenated.
+            count (int): The number of responses in response_data.
 
         Returns:
-            bool: True if the checksum is valid, False otherwise.
+            bool: True if every response's checksum is valid, False otherwise.
         """
-        checksum = _CHECKSUM_BASE - sum(ord(x) for x in response_data[:-1])
-        if checksum < 0:
-            while checksum < 0:
-                checksum += 0xff
-            checksum += 1
-        return ord(response_data[-1]) == checksum
+        numpy = _numpy() if count >= _BULK_CHECKSUM_MIN_COUNT else None
+        if numpy is None:
+            return all(HdmiMatrixController._checksum_valid(response_data[i:i + _CMD_LENGTH])
+                       for i in range(0, count * _CMD_LENGTH, _CMD_LENGTH))
+        frames = numpy.frombuffer(response_data, dtype=numpy.uint8).reshape(count, _CMD_LENGTH)
+        sums = frames[:, :-1].sum(axis=1, dtype=numpy.uint16)
+        return bool((((-sums) & 0xff).astype(numpy.uint8) == frames[:, -1]).all())
 
     @staticmethod
     def _check_port(port_number):
@@ -128,9 +251,8 @@ class HdmiMatrixController(object):
         Raises:
             ValueError: Port number invalid.
         """
-        if port_number < _MIN_PORT_NUMBER or port_number > _MAX_PORT_NUMBER:
-            logging.error('Invalid port number: %d.', port_number)
-            raise ValueError('Invalid port number.')
+        if port_number not in _VALID_PORTS:
+            raise ValueError('Invalid port number: %r.' % (port_number,))
 
     @staticmethod
     def _check_edid_value(value):
@@ -142,9 +264,8 @@ class HdmiMatrixController(object):
         Raises:
             ValueError: EDID value invalid.
         """
-        if value < _MIN_EDID or value > _MAX_EDID:
-            logging.error('Invalid EDID value: %d.', value)
-            raise ValueError('Invalid EDID value.')
+        if value not in _VALID_EDIDS:
+            raise ValueError('Invalid EDID value: %r.' % (value,))
 
     def change_port(self, input_port, output_port):
         """Changes the input on a given output port.
@@ -159,9 +280,8 @@ class HdmiMatrixController(object):
         """
         self._check_port(input_port)
         self._check_port(output_port)
-        logging.debug('Changing port %d input to %d.', output_port, input_port)
-        cmd = self._generate_cmd(_CMD_CHANGE_PORT, input_port, output_port)
-        self._send_cmd(cmd)
+        _log.debug('Changing port %d input to %d.', output_port, input_port)
+        self._send_cmd(_generate_cmd(_CMD_CHANGE_PORT, input_port, output_port))
 
     def query_port(self, output_port):
         """Queries for the input port being used by a given output port.
@@ -177,12 +297,11 @@ class HdmiMatrixController(object):
             ValueError: Port number invalid.
         """
         self._check_port(output_port)
-        logging.debug('Querying input port for %d.', output_port)
-        cmd = self._generate_cmd(_CMD_QUERY_PORT, output_port)
-        self._send_cmd(cmd)
+        _log.debug('Querying input port for %d.', output_port)
+        self._send_cmd(_generate_cmd(_CMD_QUERY_PORT, output_port))
         response = self._receive_response()
-        logging.debug('Input port for %d is port %d.', output_port, ord(response[2]))
-        return ord(response[2])
+        _log.debug('Input port for %d is port %d.', output_port, response[2])
+        return response[2]
 
     def set_edid(self, input_port, value):
         """Sets the EDID value for a given input port.
@@ -197,9 +316,8 @@ class HdmiMatrixController(object):
         """
         self._check_port(input_port)
         self._check_edid_value(value)
-        logging.debug('Setting EDID value to %d for port %d.', value, input_port)
-        cmd = self._generate_cmd(_CMD_SET_EDID, value, input_port)
-        self._send_cmd(cmd)
+        _log.debug('Setting EDID value to %d for port %d.', value, input_port)
+        self._send_cmd(_generate_cmd(_CMD_SET_EDID, value, input_port))
 
     def set_edid_to_all(self, value):
         """Sets the EDID for all input ports.
@@ -212,9 +330,27 @@ class HdmiMatrixController(object):
             ValueError: EDID value is invalid.
         """
         self._check_edid_value(value)
-        logging.debug('Setting EDID value to %d for all ports.', value)
-        cmd = self._generate_cmd(_CMD_SET_EDID_TO_ALL, value)
-        self._send_cmd(cmd)
+        _log.debug('Setting EDID value to %d for all ports.', value)
+        self._send_cmd(_generate_cmd(_CMD_SET_EDID_TO_ALL, value))
+
+    def set_edids(self, values):
+        """Sets the EDID values for several input ports in a single write.
+
+        Args:
+            values (dict): Maps input port numbers to the EDID value to use.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+            ValueError: Port number or value invalid.
+        """
+        for input_port, value in values.items():
+            self._check_port(input_port)
+            self._check_edid_value(value)
+        if not values:
+            return
+        _log.debug('Setting EDID values: %s.', values)
+        self.send_batch(_generate_cmd(_CMD_SET_EDID, value, input_port)
+                        for input_port, value in values.items())
 
     def copy_edid(self, output_port, input_port):
         """Copies the EDID value from an output port to an input port.
@@ -229,10 +365,9 @@ class HdmiMatrixController(object):
         """
         self._check_port(output_port)
         self._check_port(input_port)
-        logging.debug('Copying EDID from output port %d to input port %d.',
-                      output_port, input_port)
-        cmd = self._generate_cmd(_CMD_COPY_EDID, output_port, input_port)
-        self._send_cmd(cmd)
+        _log.debug('Copying EDID from output port %d to input port %d.',
+                   output_port, input_port)
+        self._send_cmd(_generate_cmd(_CMD_COPY_EDID, output_port, input_port))
 
     def copy_edid_to_all(self, output_port):
         """Copies the EDID value from an output port to all input ports.
@@ -245,10 +380,9 @@ class HdmiMatrixController(object):
             ValueError: Port number invalid.
         """
         self._check_port(output_port)
-        logging.debug('Copying EDID from output port %d to all input ports.',
-                      output_port)
-        cmd = self._generate_cmd(_CMD_COPY_EDID_TO_ALL, output_port)
-        self._send_cmd(cmd)
+        _log.debug('Copying EDID from output port %d to all input ports.',
+                   output_port)
+        self._send_cmd(_generate_cmd(_CMD_COPY_EDID_TO_ALL, output_port))
 
     def query_hdp(self, output_port):
         """Queries for the HDP state of an output port.
@@ -264,14 +398,10 @@ class HdmiMatrixController(object):
             ValueError: Port number invalid.
         """
         self._check_port(output_port)
-        logging.debug('Querying HDP for port %d.', output_port)
-        cmd = self._generate_cmd(_CMD_QUERY_HDP, output_port)
-        self._send_cmd(cmd)
-        response = self._receive_response()
-        logging.debug('HDP for port %d: %s.',
-                      output_port,
-                      'HIGH' if ord(response[2]) == 0 else 'LOW')
-        return ord(response[2]) == 0
+        _log.debug('Querying HDP for port %d.', output_port)
+        high = self._query_bool(_CMD_QUERY_HDP, output_port)
+        _log.debug('HDP for port %d: %s.', output_port, 'HIGH' if high else 'LOW')
+        return high
 
     def query_status(self, input_port):
         """Queries if an input port is connected.
@@ -287,14 +417,12 @@ class HdmiMatrixController(object):
             ValueError: Port number invalid.
         """
         self._check_port(input_port)
-        logging.debug('Querying cable status for port %d.', input_port)
-        cmd = self._generate_cmd(_CMD_QUERY_STATUS, input_port)
-        self._send_cmd(cmd)
-        response = self._receive_response()
-        logging.debug('Cable status for port %d: %s.',
-                      input_port,
-                      'connected' if ord(response[2]) != 0 else 'not connected')
-        return ord(response[2]) != 0
+        _log.debug('Querying cable status for port %d.', input_port)
+        connected = self._query_bool(_CMD_QUERY_STATUS, input_port, invert=True)
+        _log.debug('Cable status for port %d: %s.',
+                   input_port,
+                   'connected' if connected else 'not connected')
+        return connected
 
     def set_beep(self, enable):
         """Enables or disables beeping.
@@ -305,10 +433,9 @@ class HdmiMatrixController(object):
         Raises:
             HdmiMatrixControllerException: Error writing to serial.
         """
-        logging.debug('Turning beep %s.', 'on' if enable else 'off')
+        _log.debug('Turning beep %s.', 'on' if enable else 'off')
         beep_value = _BEEP_ON if enable else _BEEP_OFF
-        cmd = self._generate_cmd(_CMD_SET_BEEP, beep_value)
-        self._send_cmd(cmd)
+        self._send_cmd(_generate_cmd(_CMD_SET_BEEP, beep_value))
 
     def query_beep(self):
         """Queries for whether the beep is enabled.
@@ -319,50 +446,416 @@ class HdmiMatrixController(object):
         Raises:
             HdmiMatrixControllerException: Serial device error.
         """
-        logging.debug('Querying beep status.')
-        cmd = self._generate_cmd(_CMD_QUERY_BEEP)
-        self._send_cmd(cmd)
-        response = self._receive_response()
-        logging.debug('Beep is %s.', 'enabled' if ord(response[2]) == 0 else 'disabled')
-        return ord(response[2]) == 0
+        _log.debug('Querying beep status.')
+        enabled = self._query_bool(_CMD_QUERY_BEEP)
+        _log.debug('Beep is %s.', 'enabled' if enabled else 'disabled')
+        return enabled
+
+    def send_batch(self, cmds):
+        """Sends several complete commands in a single write.
+
+        Args:
+            cmds (iterable of bytes): Commands to send, in order.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+        """
+        cmd = b''.join(cmds)
+        if cmd:
+            self._send_cmd(cmd)
+
+    def receive_many(self, count):
+        """Reads and validates several back to back responses.
+
+        Intended for reading the responses to queries sent with send_batch.
+
+        Args:
+            count (int): The number of responses to read.
+
+        Returns:
+            list of bytes: The data section of each response, in order.
+
+        Raises:
+            HdmiMatrixControllerException: Error reading responses.
+        """
+        self._flush()
+        buf = bytearray(count * _CMD_LENGTH)
+        received = self._read_into(memoryview(buf))
+        if received != len(buf) or not self._checksums_valid_bulk(buf, count):
+            _log.error('Responses were invalid: %s.', bytes(buf[:received]).hex(' '))
+            raise HdmiMatrixControllerException('Did not receive valid responses')
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug('Received responses: %s.', _hex(bytes(buf)))
+        start = len(_CMD_HEADER) + _CMD_CODE_LENGTH
+        return [bytes(buf[i + start:i + _CMD_LENGTH - 1])
+                for i in range(0, len(buf), _CMD_LENGTH)]
+
+    @contextlib.contextmanager
+    def buffered(self):
+        """Buffers commands sent inside a with block and writes them at once.
+
+        The buffer is written when the block exits, or before any response is
+        read so that queries inside the block still work. Commands still
+        buffered when the block raises are discarded. Nested blocks share the
+        outermost buffer.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+        """
+        if self._buffer is not None:
+            yield
+            return
+        self._buffer = bytearray()
+        try:
+            yield
+            self._flush()
+        finally:
+            self._buffer = None
+
+    def _query_bool(self, cmd_code, arg=0, invert=False):
+        """Sends a query whose response is a flag and reads the flag.
+
+        Args:
+            cmd_code (bytes): The 2 byte query command code.
+            arg (int): Argument to the query if used.
+            invert (bool): Whether a non-zero response means True.
+
+        Returns:
+            bool: True if the response is zero, or non-zero when inverted.
+
+        Raises:
+            HdmiMatrixControllerException: Serial device error.
+        """
+        self._send_cmd(_generate_cmd(cmd_code, arg))
+        return (self._receive_response()[2] == 0) ^ invert
+
+    def _flush(self):
+        """Writes any buffered commands over serial.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+        """
+        if self._buffer:
+            cmd = bytes(self._buffer)
+            del self._buffer[:]
+            self._write(cmd)
 
     def _send_cmd(self, cmd):
-        """Sends a complete command over serial.
+        """Sends a complete command over serial, or buffers it if buffering.
+
+        Args:
+            cmd (bytes): Command to send.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+        """
+        if self._buffer is not None:
+            self._buffer += cmd
+        else:
+            self._write(cmd)
+
+    def _write(self, cmd):
+        """Writes command data over serial.
 
         Args:
-            cmd (str): Command to send.
+            cmd (bytes): Command data to write.
 
         Raises:
             HdmiMatrixControllerException: Error writing to serial.
         """
         try:
-            logging.debug('Sending cmd: %s.',
-                          ' '.join(c.encode('hex') for c in cmd))
-            self._ser.write(cmd)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug('Sending cmd: %s.', _hex(cmd))
+            self._ser_write(cmd)
         except (serial.SerialException, serial.SerialTimeoutException) as exception:
-            logging.error('Error writing to serial: %s', str(exception))
+            _log.error('Error writing to serial: %s', str(exception))
             raise HdmiMatrixControllerException(exception, 'Error writing to serial.')
 
     def _receive_response(self):
         """Reads and validates a response.
 
+        Reads until a full response has arrived, so a response split across
+        several reads is not truncated. A read returning no data (timeout)
+        ends the response early.
+
         Returns:
-            str: The data section of a response as a string.
+            bytes: The data section of a response.
 
         Raises:
             HdmiMatrixControllerException: Error reading response.
         """
+        self._flush()
+        view = memoryview(bytearray(_CMD_LENGTH))
+        received = self._read_into(view)
+        response = bytes(view[:received])
+        if received != _CMD_LENGTH or not self._checksum_valid(response):
+            _log.error('Response was invalid: %s.', response.hex(' '))
+            raise HdmiMatrixControllerException('Did not receive valid response')
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug('Received response: %s.', _hex(response))
+        return response[len(_CMD_HEADER) + _CMD_CODE_LENGTH:-1]
+
+    def _read_into(self, view):
+        """Reads from serial until a buffer is full or a read returns no data.
+
+        Args:
+            view (memoryview): The writable buffer to fill.
+
+        Returns:
+            int: The number of bytes read into the buffer.
+
+        Raises:
+            HdmiMatrixControllerException: Error reading from serial.
+        """
+        received = 0
         try:
-            logging.debug('Attempting to read from serial.')
-            response = self._ser.read(_CMD_LENGTH)
+            _log.debug('Attempting to read from serial.')
+            while received < len(view):
+                count = self._ser_readinto(view[received:])
+                if not count:
+                    break
+                received += count
         except (serial.SerialException, serial.SerialTimeoutException) as exception:
-            logging.error('Error reading from serial: %s', str(exception))
+            _log.error('Error reading from serial: %s', str(exception))
             raise HdmiMatrixControllerException(exception, 'Error reading from serial')
-        else:
-            if len(response) != _CMD_LENGTH or not self._checksum_valid(response):
-                logging.error('Response was invalid: %s.',
-                              ' '.join(c.encode('hex') for c in response))
-                raise HdmiMatrixControllerException('Did not receive valid response')
-            logging.debug('Received response: %s.',
-                          ' '.join(c.encode('hex') for c in response))
-            return response[len(_CMD_HEADER) + _CMD_CODE_LENGTH:-1]
+        return received
+
+
+class AsyncHdmiMatrixController(object):
+    """Controls an HDMI matrix device over RS232 using asyncio.
+
+    Each command holds a lock on the connection until it and its response, if
+    any, have been transferred, so concurrent calls never interleave on the
+    wire. Several devices can be driven concurrently from one event loop.
+    """
+
+    def __init__(self, reader, writer, timeout=1):
+        """Initializer.
+
+        Args:
+            reader (obj: asyncio.StreamReader): Reader for the serial device.
+            writer (obj: asyncio.StreamWriter): Writer for the serial device.
+            timeout (float): Seconds to wait for a response, or None to wait forever.
+        """
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, url, baudrate, timeout=1, **kwargs):
+        """Opens a serial device and creates a controller for it.
+
+        Args:
+            url (str): The serial device to open, e.g. '/dev/ttyUSB0'.
+            baudrate (int): The baud rate to use.
+            timeout (float): Seconds to wait for a response, or None to wait forever.
+            **kwargs: Passed on to serial.serial_for_url.
+
+        Returns:
+            AsyncHdmiMatrixController: A controller for the opened device.
+
+        Raises:
+            RuntimeError: pyserial-asyncio is not installed.
+        """
+        if serial_asyncio is None:
+            raise RuntimeError('pyserial-asyncio is required for AsyncHdmiMatrixController.')
+        reader, writer = await serial_asyncio.open_serial_connection(
+            url=url, baudrate=baudrate, **kwargs)
+        return cls(reader, writer, timeout)
+
+    async def change_port(self, input_port, output_port):
+        """Changes the input on a given output port.
+
+        See HdmiMatrixController.change_port.
+        """
+        HdmiMatrixController._check_port(input_port)
+        HdmiMatrixController._check_port(output_port)
+        _log.debug('Changing port %d input to %d.', output_port, input_port)
+        await self._send_cmd(_generate_cmd(_CMD_CHANGE_PORT, input_port, output_port))
+
+    async def query_port(self, output_port):
+        """Queries for the input port being used by a given output port.
+
+        See HdmiMatrixController.query_port.
+        """
+        HdmiMatrixController._check_port(output_port)
+        _log.debug('Querying input port for %d.', output_port)
+        response = await self._query(_generate_cmd(_CMD_QUERY_PORT, output_port))
+        return response[2]
+
+    async def set_edid(self, input_port, value):
+        """Sets the EDID value for a given input port.
+
+        See HdmiMatrixController.set_edid.
+        """
+        HdmiMatrixController._check_port(input_port)
+        HdmiMatrixController._check_edid_value(value)
+        _log.debug('Setting EDID value to %d for port %d.', value, input_port)
+        await self._send_cmd(_generate_cmd(_CMD_SET_EDID, value, input_port))
+
+    async def set_edid_to_all(self, value):
+        """Sets the EDID for all input ports.
+
+        See HdmiMatrixController.set_edid_to_all.
+        """
+        HdmiMatrixController._check_edid_value(value)
+        _log.debug('Setting EDID value to %d for all ports.', value)
+        await self._send_cmd(_generate_cmd(_CMD_SET_EDID_TO_ALL, value))
+
+    async def copy_edid(self, output_port, input_port):
+        """Copies the EDID value from an output port to an input port.
+
+        See HdmiMatrixController.copy_edid.
+        """
+        HdmiMatrixController._check_port(output_port)
+        HdmiMatrixController._check_port(input_port)
+        _log.debug('Copying EDID from output port %d to input port %d.',
+                   output_port, input_port)
+        await self._send_cmd(_generate_cmd(_CMD_COPY_EDID, output_port, input_port))
+
+    async def copy_edid_to_all(self, output_port):
+        """Copies the EDID value from an output port to all input ports.
+
+        See HdmiMatrixController.copy_edid_to_all.
+        """
+        HdmiMatrixController._check_port(output_port)
+        _log.debug('Copying EDID from output port %d to all input ports.',
+                   output_port)
+        await self._send_cmd(_generate_cmd(_CMD_COPY_EDID_TO_ALL, output_port))
+
+    async def query_hdp(self, output_port):
+        """Queries for the HDP state of an output port.
+
+        See HdmiMatrixController.query_hdp.
+        """
+        HdmiMatrixController._check_port(output_port)
+        _log.debug('Querying HDP for port %d.', output_port)
+        return await self._query_bool(_CMD_QUERY_HDP, output_port)
+
+    async def query_status(self, input_port):
+        """Queries if an input port is connected.
+
+        See HdmiMatrixController.query_status.
+        """
+        HdmiMatrixController._check_port(input_port)
+        _log.debug('Querying cable status for port %d.', input_port)
+        return await self._query_bool(_CMD_QUERY_STATUS, input_port, invert=True)
+
+    async def set_beep(self, enable):
+        """Enables or disables beeping.
+
+        See HdmiMatrixController.set_beep.
+        """
+        _log.debug('Turning beep %s.', 'on' if enable else 'off')
+        beep_value = _BEEP_ON if enable else _BEEP_OFF
+        await self._send_cmd(_generate_cmd(_CMD_SET_BEEP, beep_value))
+
+    async def query_beep(self):
+        """Queries for whether the beep is enabled.
+
+        See HdmiMatrixController.query_beep.
+        """
+        _log.debug('Querying beep status.')
+        return await self._query_bool(_CMD_QUERY_BEEP)
+
+    async def _send_cmd(self, cmd):
+        """Sends a complete command over serial.
+
+        Args:
+            cmd (bytes): Command to send.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+        """
+        async with self._lock:
+            await self._write(cmd)
+
+    async def _query(self, cmd):
+        """Sends a complete command over serial and reads its response.
+
+        Args:
+            cmd (bytes): Command to send.
+
+        Returns:
+            bytes: The data section of the response.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing command or reading response.
+        """
+        async with self._lock:
+            await self._write(cmd)
+            return await self._receive_response()
+
+    async def _query_bool(self, cmd_code, arg=0, invert=False):
+        """Sends a query whose response is a flag and reads the flag.
+
+        See HdmiMatrixController._query_bool.
+        """
+        response = await self._query(_generate_cmd(cmd_code, arg))
+        return (response[2] == 0) ^ invert
+
+    async def _write(self, cmd):
+        """Writes command data and waits for it to be flushed.
+
+        Args:
+            cmd (bytes): Command data to write.
+
+        Raises:
+            HdmiMatrixControllerException: Error writing to serial.
+        """
+        try:
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug('Sending cmd: %s.', _hex(cmd))
+            self._writer.write(cmd)
+            await self._writer.drain()
+        except (serial.SerialException, serial.SerialTimeoutException) as exception:
+            _log.error('Error writing to serial: %s', str(exception))
+            raise HdmiMatrixControllerException(exception, 'Error writing to serial.')
+
+    async def _receive_response(self):
+        """Reads and validates a response.
+
+        Returns:
+            bytes: The data section of a response.
+
+        Raises:
+            HdmiMatrixControllerException: Error reading response.
+        """
+        try:
+            _log.debug('Attempting to read from serial.')
+            response = await asyncio.wait_for(self._reader.readexactly(_CMD_LENGTH),
+                                              self._timeout)
+        except asyncio.TimeoutError:
+            _log.error('Timed out waiting for response.')
+            await self._discard_input()
+            raise HdmiMatrixControllerException('Timed out waiting for response')
+        except asyncio.IncompleteReadError as exception:
+            _log.error('Response was invalid: %s.', exception.partial.hex(' '))
+            raise HdmiMatrixControllerException('Did not receive valid response')
+        except (serial.SerialException, serial.SerialTimeoutException) as exception:
+            _log.error('Error reading from serial: %s', str(exception))
+            raise HdmiMatrixControllerException(exception, 'Error reading from serial')
+        if not HdmiMatrixController._checksum_valid(response):
+            _log.error('Response was invalid: %s.', response.hex(' '))
+            raise HdmiMatrixControllerException('Did not receive valid response')
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug('Received response: %s.', _hex(response))
+        return response[len(_CMD_HEADER) + _CMD_CODE_LENGTH:-1]
+
+    async def _discard_input(self):
+        """Discards input left over from a timed out read.
+
+        Reads until no data arrives for _DISCARD_QUIET_TIME seconds, so a
+        partial or late response is not taken as the reply to the next command.
+        Called with the lock held.
+        """
+        while True:
+            try:
+                data = await asyncio.wait_for(self._reader.read(_CMD_LENGTH),
+                                              _DISCARD_QUIET_TIME)
+            except asyncio.TimeoutError:
+                return
+            if not data:
+                return
+            _log.debug('Discarding stale input: %s.', data.hex(' '))
@@ -1,8 +1,10 @@
 """Unit tests for HdmiMatrixController."""
 # pylint: disable=missing-docstring,invalid-name,too-many-public-methods,protected-access
 
+import asyncio
 import logging
 import unittest
+from unittest import mock
 
 import serial
 
@@ -19,13 +21,18 @@ logging.disable(logging.CRITICAL)
 class FakeSerialDevice(object):
 
     def __init__(self):
-        self.last_write = ''
-        self.response = ''
+        self.last_write = b''
+        self.write_count = 0
+        self.response = b''
+        self._read_position = 0
+        self._chunk_size = None
         self._enable_write_exception = False
         self._enable_read_exception = False
 
-    def set_response(self, response):
+    def set_response(self, response, chunk_size=None):
         self.response = response
+        self._read_position = 0
+        self._chunk_size = chunk_size
 
     def enable_write_exception(self):
         self._enable_write_exception = True
@@ -37,11 +44,41 @@ class FakeSerialDevice(object):
         if self._enable_write_exception:
             raise serial.SerialException()
         self.last_write = data
+        self.write_count += 1
 
-    def read(self, _):
+    def readinto(self, buf):
         if self._enable_read_exception:
             raise serial.SerialException()
-        return self.response
+        count = min(len(buf), len(self.response) - self._read_position)
+        if self._chunk_size is not None:
+            count = min(count, self._chunk_size)
+        buf[:count] = self.response[self._read_position:self._read_position + count]
+        self._read_position += count
+        return count
+
+
+class FakeStreamWriter(object):
+
+    def __init__(self):
+        self.writes = []
+        self.drain_released = None
+        self._enable_write_exception = False
+
+    def enable_write_exception(self):
+        self._enable_write_exception = True
+
+    def write(self, data):
+        if self._enable_write_exception:
+            raise serial.SerialException()
+        self.writes.append(data)
+
+    def block_drain(self):
+        self.drain_released = asyncio.Event()
+
+    async def drain(self):
+        if self.drain_released is not None:
+            await self.drain_released.wait()
+        await asyncio.sleep(0)
 
 
 class HdmiMatrixControllerTest(unittest.TestCase):
@@ -53,11 +90,11 @@ class HdmiMatrixControllerTest(unittest.TestCase):
 
     @staticmethod
     def _cmd_code(cmd):
-        return [ord(x) for x in cmd[2:4]]
+        return cmd[2:4]
 
     @staticmethod
     def _data(cmd):
-        return [ord(x) for x in cmd[4:-1]]
+        return cmd[4:-1]
 
     def _validate_sent_cmd(self, cmd, cmd_code, arg1=None, arg2=None):
         self.assertEqual(hdmi_matrix_controller._CMD_LENGTH, len(cmd))
@@ -67,6 +104,12 @@ class HdmiMatrixControllerTest(unittest.TestCase):
         if arg2 is not None:
             self.assertEqual(arg2, self._data(cmd)[2])
 
+    def test_checksum_large_sum(self):
+        cmd = hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_SET_BEEP,
+                                                   0xff, 0xff)
+        self.assertEqual(0, sum(cmd) & 0xff)
+        self.assertTrue(hdmi_matrix_controller.HdmiMatrixController._checksum_valid(cmd))
+
     def test_change_port_success(self):
         self.controller.change_port(VALID_PORT, VALID_PORT)
         cmd = self.fake_serial_device.last_write
@@ -83,7 +126,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
 
     def test_query_port_success(self):
         expected_port = 1
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_PORT, VALID_PORT, expected_port)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_port(VALID_PORT)
@@ -120,6 +163,30 @@ class HdmiMatrixControllerTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.controller.set_edid_to_all(INVALID_EDID)
 
+    def test_set_edids_success(self):
+        self.controller.set_edids({1: VALID_EDID, 2: VALID_EDID})
+        cmd = self.fake_serial_device.last_write
+        self.assertEqual(1, self.fake_serial_device.write_count)
+        self.assertEqual(2 * hdmi_matrix_controller._CMD_LENGTH, len(cmd))
+        self._validate_sent_cmd(cmd[:hdmi_matrix_controller._CMD_LENGTH],
+                                hdmi_matrix_controller._CMD_SET_EDID, VALID_EDID, 1)
+        self._validate_sent_cmd(cmd[hdmi_matrix_controller._CMD_LENGTH:],
+                                hdmi_matrix_controller._CMD_SET_EDID, VALID_EDID, 2)
+
+    def test_set_edids_empty(self):
+        self.controller.set_edids({})
+        self.assertEqual(0, self.fake_serial_device.write_count)
+
+    def test_set_edids_invalid_port(self):
+        with self.assertRaises(ValueError):
+            self.controller.set_edids({VALID_PORT: VALID_EDID, INVALID_PORT: VALID_EDID})
+        self.assertEqual(0, self.fake_serial_device.write_count)
+
+    def test_set_edids_invalid_value(self):
+        with self.assertRaises(ValueError):
+            self.controller.set_edids({VALID_PORT: INVALID_EDID})
+        self.assertEqual(0, self.fake_serial_device.write_count)
+
     def test_copy_edid_success(self):
         self.controller.copy_edid(VALID_PORT, VALID_PORT)
         cmd = self.fake_serial_device.last_write
@@ -145,7 +212,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
             self.controller.copy_edid_to_all(INVALID_PORT)
 
     def test_query_hdp_success(self):
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_HDP, VALID_PORT, 0)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_hdp(VALID_PORT)
@@ -154,7 +221,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
                                 VALID_PORT)
         self.assertTrue(result)
 
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_HDP, VALID_PORT, 0xff)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_hdp(VALID_PORT)
@@ -168,7 +235,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
             self.controller.query_hdp(INVALID_PORT)
 
     def test_query_status_success(self):
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_STATUS, VALID_PORT, 0)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_status(VALID_PORT)
@@ -177,7 +244,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
                                 VALID_PORT)
         self.assertFalse(result)
 
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_STATUS, VALID_PORT, 0xff)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_status(VALID_PORT)
@@ -201,7 +268,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
                                 hdmi_matrix_controller._BEEP_OFF)
 
     def test_query_beep_success(self):
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_beep()
@@ -209,7 +276,7 @@ class HdmiMatrixControllerTest(unittest.TestCase):
         self._validate_sent_cmd(cmd, hdmi_matrix_controller._CMD_QUERY_BEEP)
         self.assertTrue(result)
 
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0xff)
         self.fake_serial_device.set_response(fake_response)
         result = self.controller.query_beep()
@@ -217,6 +284,159 @@ class HdmiMatrixControllerTest(unittest.TestCase):
         self._validate_sent_cmd(cmd, hdmi_matrix_controller._CMD_QUERY_BEEP)
         self.assertFalse(result)
 
+    def test_send_batch_success(self):
+        cmds = [hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_QUERY_BEEP),
+                hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_SET_BEEP,
+                                                     hdmi_matrix_controller._BEEP_ON)]
+        self.controller.send_batch(cmds)
+        self.assertEqual(1, self.fake_serial_device.write_count)
+        self.assertEqual(b''.join(cmds), self.fake_serial_device.last_write)
+
+    def test_send_batch_empty(self):
+        self.controller.send_batch([])
+        self.assertEqual(0, self.fake_serial_device.write_count)
+
+    def test_buffered_single_write(self):
+        with self.controller.buffered():
+            self.controller.set_beep(True)
+            self.controller.change_port(VALID_PORT, VALID_PORT)
+            self.assertEqual(0, self.fake_serial_device.write_count)
+        cmd = self.fake_serial_device.last_write
+        self.assertEqual(1, self.fake_serial_device.write_count)
+        self._validate_sent_cmd(cmd[:hdmi_matrix_controller._CMD_LENGTH],
+                                hdmi_matrix_controller._CMD_SET_BEEP,
+                                hdmi_matrix_controller._BEEP_ON)
+        self._validate_sent_cmd(cmd[hdmi_matrix_controller._CMD_LENGTH:],
+                                hdmi_matrix_controller._CMD_CHANGE_PORT, VALID_PORT, VALID_PORT)
+
+    def test_buffered_query_flushes(self):
+        fake_response = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)
+        self.fake_serial_device.set_response(fake_response)
+        with self.controller.buffered():
+            self.controller.set_beep(True)
+            self.assertTrue(self.controller.query_beep())
+            self.assertEqual(1, self.fake_serial_device.write_count)
+            self.assertEqual(2 * hdmi_matrix_controller._CMD_LENGTH,
+                             len(self.fake_serial_device.last_write))
+        self.assertEqual(1, self.fake_serial_device.write_count)
+
+    def test_buffered_error_discards(self):
+        with self.assertRaises(ValueError):
+            with self.controller.buffered():
+                self.controller.set_beep(True)
+                self.controller.change_port(INVALID_PORT, VALID_PORT)
+        self.assertEqual(0, self.fake_serial_device.write_count)
+        self.controller.set_beep(False)
+        self.assertEqual(1, self.fake_serial_device.write_count)
+
+    def test_build_frames_success(self):
+        cmd_codes = [hdmi_matrix_controller._CMD_CHANGE_PORT,
+                     hdmi_matrix_controller._CMD_SET_EDID,
+                     hdmi_matrix_controller._CMD_SET_BEEP]
+        args = [(1, 4), (VALID_EDID, 2), (hdmi_matrix_controller._BEEP_OFF, 0)]
+        expected = b''.join(hdmi_matrix_controller._generate_cmd(cmd_code, arg1, arg2)
+                            for cmd_code, (arg1, arg2) in zip(cmd_codes, args))
+        self.assertEqual(expected, self.controller.build_frames(cmd_codes, args))
+
+    def test_build_frames_list_codes(self):
+        cmd_codes = [list(hdmi_matrix_controller._CMD_COPY_EDID)]
+        self.assertEqual(
+            hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_COPY_EDID, 3, 1),
+            self.controller.build_frames(cmd_codes, [(3, 1)]))
+
+    def test_build_frames_empty(self):
+        self.assertEqual(b'', self.controller.build_frames([], []))
+
+    def test_build_frames_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.controller.build_frames([hdmi_matrix_controller._CMD_QUERY_BEEP], [])
+
+    def test_build_frames_unknown_code(self):
+        with self.assertRaises(ValueError):
+            self.controller.build_frames([b'\x09\x09'], [(1, 2)])
+
+    def test_build_frames_ndarray(self):
+        numpy = hdmi_matrix_controller._numpy()
+        if numpy is None:
+            self.skipTest('numpy is not installed')
+        cmd_codes = [hdmi_matrix_controller._CMD_CHANGE_PORT,
+                     hdmi_matrix_controller._CMD_SET_BEEP]
+        args = [(1, 4), (hdmi_matrix_controller._BEEP_ON, 0)]
+        expected = self.controller.build_frames(cmd_codes, args)
+        self.assertEqual(expected, self.controller.build_frames(
+            numpy.array([list(cmd_code) for cmd_code in cmd_codes]), numpy.array(args)))
+
+    def test_build_frames_invalid_code(self):
+        for cmd_code in [[2, 256], [2.0, 3], 5]:
+            with self.assertRaises(ValueError):
+                self.controller.build_frames([cmd_code], [(1, 2)])
+
+    def test_build_frames_invalid_args(self):
+        for args in [(256, 0), (0, 256), (-1, 0), (1.5, 2), (1, '2')]:
+            with self.assertRaises(ValueError):
+                self.controller.build_frames([hdmi_matrix_controller._CMD_SET_EDID], [args])
+
+    def test_receive_many_success(self):
+        responses = [hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_PORT, port, 5 - port) for port in range(1, 5)]
+        self.fake_serial_device.set_response(b''.join(responses), chunk_size=20)
+        result = self.controller.receive_many(len(responses))
+        self.assertEqual([4, 3, 2, 1], [data[2] for data in result])
+        self.assertEqual(responses[0][4:-1], result[0])
+
+    def test_receive_many_without_numpy(self):
+        count = hdmi_matrix_controller._BULK_CHECKSUM_MIN_COUNT
+        responses = [hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_HDP, VALID_PORT, 0xff)] * count
+        self.fake_serial_device.set_response(b''.join(responses))
+        with mock.patch.object(hdmi_matrix_controller, '_numpy', return_value=None):
+            result = self.controller.receive_many(count)
+        self.assertEqual([0xff] * count, [data[2] for data in result])
+
+    def test_receive_many_small_count_skips_numpy(self):
+        responses = [hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)] * 2
+        self.fake_serial_device.set_response(b''.join(responses))
+        with mock.patch.object(hdmi_matrix_controller, '_numpy') as numpy_import:
+            self.controller.receive_many(len(responses))
+        numpy_import.assert_not_called()
+
+    def test_receive_many_wrong_length(self):
+        responses = [hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)] * 2
+        self.fake_serial_device.set_response(b''.join(responses)[:-1])
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            self.controller.receive_many(len(responses))
+
+    def test_receive_many_wrong_checksum(self):
+        fake_response = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)
+        self.fake_serial_device.set_response(fake_response + fake_response[:-1] + b'\x00')
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            self.controller.receive_many(2)
+
+    def test_checksums_valid_bulk(self):
+        count = hdmi_matrix_controller._BULK_CHECKSUM_MIN_COUNT
+        fake_response = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_STATUS, VALID_PORT, 0xff)
+        valid = fake_response * count
+        invalid = fake_response * (count - 1) + fake_response[:-1] + b'\x00'
+        check = hdmi_matrix_controller.HdmiMatrixController._checksums_valid_bulk
+        for numpy_module in [hdmi_matrix_controller._numpy(), None]:
+            with mock.patch.object(hdmi_matrix_controller, '_numpy',
+                                   return_value=numpy_module):
+                self.assertTrue(check(valid, count))
+                self.assertFalse(check(invalid, count))
+                self.assertFalse(check(fake_response[:-1] + b'\x00', 1))
+
+    def test_hex_caches_only_single_frames(self):
+        frame = hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_QUERY_BEEP)
+        hdmi_matrix_controller._hex_frame.cache_clear()
+        self.assertEqual(frame.hex(' '), hdmi_matrix_controller._hex(frame))
+        self.assertEqual((frame * 2).hex(' '), hdmi_matrix_controller._hex(frame * 2))
+        self.assertEqual(1, hdmi_matrix_controller._hex_frame.cache_info().currsize)
+
     def test_send_cmd_error(self):
         self.fake_serial_device.enable_write_exception()
         with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
@@ -228,21 +448,139 @@ class HdmiMatrixControllerTest(unittest.TestCase):
             self.controller.query_beep()
 
     def test_receive_response_wrong_length(self):
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
-            hdmi_matrix_controller._CMD_QUERY_BEEP + [0], 0, 0)
+        fake_response = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)[:-1]
         self.fake_serial_device.set_response(fake_response)
         with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
             self.controller.query_beep()
 
+    def test_receive_response_split_reads(self):
+        fake_response = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)
+        self.fake_serial_device.set_response(fake_response, chunk_size=5)
+        self.assertTrue(self.controller.query_beep())
+
     def test_receive_response_wrong_checksum(self):
-        fake_response = hdmi_matrix_controller.HdmiMatrixController._generate_cmd(
+        fake_response = hdmi_matrix_controller._generate_cmd(
             hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)
         # Modify checksum
-        fake_response = fake_response[:-1] + '\x00'
+        fake_response = fake_response[:-1] + b'\x00'
         self.fake_serial_device.set_response(fake_response)
         with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
             self.controller.query_beep()
 
 
+class AsyncHdmiMatrixControllerTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.reader = asyncio.StreamReader()
+        self.writer = FakeStreamWriter()
+        self.controller = hdmi_matrix_controller.AsyncHdmiMatrixController(
+            self.reader, self.writer)
+
+    async def test_change_port_success(self):
+        await self.controller.change_port(VALID_PORT, 2)
+        self.assertEqual([hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_CHANGE_PORT, VALID_PORT, 2)], self.writer.writes)
+
+    async def test_change_port_invalid_port(self):
+        with self.assertRaises(ValueError):
+            await self.controller.change_port(INVALID_PORT, VALID_PORT)
+        self.assertEqual([], self.writer.writes)
+
+    async def test_query_port_success(self):
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_PORT, VALID_PORT, 3))
+        self.assertEqual(3, await self.controller.query_port(VALID_PORT))
+        self.assertEqual([hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_PORT, VALID_PORT)], self.writer.writes)
+
+    async def test_query_hdp_success(self):
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_HDP, VALID_PORT, 0))
+        self.assertTrue(await self.controller.query_hdp(VALID_PORT))
+
+    async def test_query_status_success(self):
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_STATUS, VALID_PORT, 0))
+        self.assertFalse(await self.controller.query_status(VALID_PORT))
+
+    async def test_set_edid_invalid_value(self):
+        with self.assertRaises(ValueError):
+            await self.controller.set_edid(VALID_PORT, INVALID_EDID)
+
+    async def test_concurrent_queries_do_not_interleave(self):
+        beep_cmd = hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_QUERY_BEEP)
+        port_cmd = hdmi_matrix_controller._generate_cmd(hdmi_matrix_controller._CMD_QUERY_PORT, 2)
+        self.writer.block_drain()
+        beep = asyncio.ensure_future(self.controller.query_beep())
+        port = asyncio.ensure_future(self.controller.query_port(2))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertEqual([beep_cmd], self.writer.writes)
+
+        self.writer.drain_released.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertEqual([beep_cmd], self.writer.writes)
+
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0))
+        self.assertTrue(await beep)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertEqual([beep_cmd, port_cmd], self.writer.writes)
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_PORT, 2, 4))
+        self.assertEqual(4, await port)
+
+    async def test_receive_response_timeout(self):
+        controller = hdmi_matrix_controller.AsyncHdmiMatrixController(
+            self.reader, self.writer, timeout=0.01)
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            await controller.query_beep()
+        # The lock is released, so later commands still go through.
+        await controller.set_beep(True)
+        self.assertEqual(2, len(self.writer.writes))
+
+    async def test_receive_response_timeout_discards_stale_input(self):
+        controller = hdmi_matrix_controller.AsyncHdmiMatrixController(
+            self.reader, self.writer, timeout=0.01)
+        stale = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0xff)
+        self.reader.feed_data(stale[:5])
+        asyncio.get_running_loop().call_later(0.02, self.reader.feed_data, stale[5:])
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            await controller.query_beep()
+
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_PORT, 2, 4))
+        self.assertEqual(4, await controller.query_port(2))
+
+    async def test_send_cmd_error(self):
+        self.writer.enable_write_exception()
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            await self.controller.set_beep(True)
+
+    async def test_receive_response_wrong_length(self):
+        self.reader.feed_data(hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)[:-1])
+        self.reader.feed_eof()
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            await self.controller.query_beep()
+
+    async def test_receive_response_wrong_checksum(self):
+        fake_response = hdmi_matrix_controller._generate_cmd(
+            hdmi_matrix_controller._CMD_QUERY_BEEP, 0, 0)
+        self.reader.feed_data(fake_response[:-1] + b'\x00')
+        with self.assertRaises(hdmi_matrix_controller.HdmiMatrixControllerException):
+            await self.controller.query_beep()
+
+    async def test_open_without_serial_asyncio(self):
+        with mock.patch.object(hdmi_matrix_controller, 'serial_asyncio', None):
+            with self.assertRaises(RuntimeError):
+                await hdmi_matrix_controller.AsyncHdmiMatrixController.open('/dev/null', 19200)
+
+
 if __name__ == '__main__':
     unittest.main()
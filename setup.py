@@ -7,8 +7,13 @@ setup(
     author='Sean Watson',
     license='MIT',
     py_modules=['hdmi_matrix_controller'],
+    python_requires='>=3.8',
     install_requires=[
         'pyserial',
     ],
+    extras_require={
+        'asyncio': ['pyserial-asyncio'],
+        'numpy': ['numpy'],
+    },
     zip_safe=False
 )